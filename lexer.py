@@ -1,9 +1,11 @@
 # The lexical analyzer for a custom json-like language.
-from enum import Enum
-from typing import List, Optional, Tuple, Dict
+import re
+from bisect import bisect_right
+from enum import IntEnum
+from typing import List, Optional, Tuple, Dict, Callable, Pattern, Iterator, FrozenSet, Final, NoReturn
 
 
-class TokenType(Enum):
+class TokenType(IntEnum):
     # Literal
     STRING = 1
     NUMBER = 2
@@ -24,17 +26,41 @@ class TokenType(Enum):
     TABS = 16
 
 
-LITERAL_TYPES = {TokenType.STRING, TokenType.NUMBER, TokenType.BOOLEAN, TokenType.NULL, TokenType.VARIABLE}
-NON_EDITABLE_TYPES = {TokenType.LBRACE, TokenType.RBRACE, TokenType.LBRACKET, TokenType.RBRACKET, TokenType.COLON,
-                      TokenType.COMMA, TokenType.COMMENT, TokenType.NEWLINES, TokenType.SPACES, TokenType.TABS}
-NON_JSON_TYPES = {TokenType.COMMENT, TokenType.NEWLINES, TokenType.SPACES, TokenType.TABS}
-EMPTY_SPACE_TYPES = {TokenType.SPACES, TokenType.TABS, TokenType.NEWLINES}
+LITERAL_TYPES: Final[FrozenSet[TokenType]] = frozenset({
+    TokenType.STRING, TokenType.NUMBER, TokenType.BOOLEAN, TokenType.NULL, TokenType.VARIABLE})
+NON_EDITABLE_TYPES: Final[FrozenSet[TokenType]] = frozenset({
+    TokenType.LBRACE, TokenType.RBRACE, TokenType.LBRACKET, TokenType.RBRACKET, TokenType.COLON, TokenType.COMMA,
+    TokenType.COMMENT, TokenType.NEWLINES, TokenType.SPACES, TokenType.TABS})
+NON_JSON_TYPES: Final[FrozenSet[TokenType]] = frozenset({
+    TokenType.COMMENT, TokenType.NEWLINES, TokenType.SPACES, TokenType.TABS})
+EMPTY_SPACE_TYPES: Final[FrozenSet[TokenType]] = frozenset({TokenType.SPACES, TokenType.TABS, TokenType.NEWLINES})
 
-# define tokens
+# Longest empty space run whose value is shared between tokens
+_MAX_SHARED_RUN: Final[int] = 64
+
+_RE_SPACES: Final[Pattern[str]] = re.compile(r' *')
+_RE_TABS: Final[Pattern[str]] = re.compile(r'\t*')
+_RE_NEWLINES: Final[Pattern[str]] = re.compile(r'\n*')
+_RE_NEWLINE: Final[Pattern[str]] = re.compile(r'\n')
+_RE_NUMBER: Final[Pattern[str]] = re.compile(r'-?[0-9.]*(?:[eE][+-]?[0-9]+)?')
+_RE_IDENT: Final[Pattern[str]] = re.compile(r'[^\W\d]\w*')
+
+# define tokens, immutable since tokens with a fixed value are shared
 class Token:
+    __slots__ = ('type', 'value')
+
+    type: TokenType
+    value: str
+
     def __init__(self, type: TokenType, value: str):
-        self.type: TokenType = type
-        self.value: str = value
+        _set_token_type(self, type)
+        _set_token_value(self, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{self.__class__.__name__} is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{self.__class__.__name__} is immutable')
 
     def __str__(self):
         if self.type in [TokenType.COLON, TokenType.LBRACE, TokenType.RBRACE, TokenType.LBRACKET, TokenType.RBRACKET,
@@ -58,6 +84,11 @@ class Token:
         return hash((self.type, self.value))
 
 
+# Slot setters that bypass Token.__setattr__
+_set_token_type: Final[Callable[[Token, TokenType], None]] = Token.type.__set__
+_set_token_value: Final[Callable[[Token, str], None]] = Token.value.__set__
+
+
 class AlexsonLexicalError(Exception):
     def __init__(self, msg: str, row: int, col: int):
         self.msg = msg
@@ -69,173 +100,214 @@ class AlexsonLexicalError(Exception):
 
 
 class Lexer:
+    __slots__ = ('text', 'length', 'pos', '_token_starts', '_newline_offsets', '_run_values')
+
     def __init__(self, text: str):
+        # Value of the empty space runs seen so far, by token type and length.
+        # Indentation looks the same from one document to the next, so this survives reset()
+        self._run_values: Dict[TokenType, Dict[int, str]] = {
+            TokenType.SPACES: {}, TokenType.TABS: {}, TokenType.NEWLINES: {}}
+        self.reset(text)
+
+    def reset(self, text: str) -> None:
         self.text: str = text
+        self.length: int = len(text)
         self.pos: int = 0
-        self.row: int = 1
-        self.col: int = 0
-        self.current_char: Optional[str] = self.text[self.pos] if len(self.text) > 0 else None
-        self.token_id_position_map: Dict[int, Tuple[int, int]] = {}
+        # Start offset of every token produced so far, row and column are only derived on demand
+        self._token_starts: List[int] = []
+        self._newline_offsets: Optional[List[int]] = None
 
-    def error(self, msg=''):
-        raise AlexsonLexicalError(msg, self.row, self.col)
+    @property
+    def current_char(self) -> Optional[str]:
+        return self.text[self.pos] if self.pos < self.length else None
+
+    @property
+    def row(self) -> int:
+        return self.get_position(self.pos)[0]
+
+    @property
+    def col(self) -> int:
+        return self.get_position(self.pos)[1]
 
-    def _next(self) -> None:
-        self.pos += 1
+    def get_position(self, offset: int) -> Tuple[int, int]:
+        if self._newline_offsets is None:
+            self._newline_offsets = [match.start() for match in _RE_NEWLINE.finditer(self.text)]
 
-        if self.pos == len(self.text):
-            self.current_char = None  # Indicates end of input
-        elif self.pos > len(self.text):
+        # A newline character counts as column 0 of the line it starts
+        row = bisect_right(self._newline_offsets, offset) + 1
+        col = offset - self._newline_offsets[row - 2] if row > 1 else offset
+        return row, col
+
+    def error(self, msg: str = '') -> NoReturn:
+        raise AlexsonLexicalError(msg, self.row, self.col)
+
+    def next(self, length: int = 1) -> None:
+        self.pos += length
+        if self.pos > self.length:
             self.error('End of input')
-        else:
-            self.current_char = self.text[self.pos]
-
-        if self.current_char == '\n':
-            self.row += 1
-            self.col = 0
-        else:
-            self.col += 1
-
-    def next(self, length: int = 1):
-        for i in range(length):
-            self._next()
-
-    def peek(self, length: int = 1) -> Optional[str]:
-        peek_pos = self.pos + length
-        if peek_pos >= len(self.text):
-            return None
-        else:
-            return self.text[self.pos + 1:peek_pos + 1]
+
+    def peek(self, literal: str) -> bool:
+        return self.text.startswith(literal, self.pos + 1)
 
     def tokenize(self) -> List[Token]:
-        tokens: List[Token] = []
-        while self.current_char is not None:
-            token = self.next_token()
-            if token is not None:
-                tokens.append(token)
-        return tokens
+        return list(self.iter_tokens())
+
+    def iter_tokens(self) -> Iterator[Token]:
+        scan = self._scan
+        while self.pos < self.length:
+            yield scan()
 
     def next_token(self) -> Optional[Token]:
-        token = None
-        if self.current_char is not None:
-            if self.current_char == 't' and self.peek(3) == 'rue':
-                token = Token(TokenType.BOOLEAN, 'true')
-                self.next(4)
-            elif self.current_char == 'f' and self.peek(4) == 'alse':
-                token = Token(TokenType.BOOLEAN, 'false')
-                self.next(5)
-            elif self.current_char == 'n' and self.peek(3) == 'ull':
-                token = Token(TokenType.NULL, 'null')
-                self.next(4)
-            elif self.current_char == '"':
-                token = self.string()
-            elif self.current_char == '#':
-                token = self.comment()
-            elif self.current_char == '\n':
-                token = self.newlines()
-            elif self.current_char == '\t':
-                token = self.tabs()
-            elif self.current_char == ' ':
-                token = self.whitespaces()
-            elif self.current_char == '{':
-                self.next()
-                token = Token(TokenType.LBRACE, '{')
-            elif self.current_char == '}':
-                self.next()
-                token = Token(TokenType.RBRACE, '}')
-            elif self.current_char == '[':
-                self.next()
-                token = Token(TokenType.LBRACKET, '[')
-            elif self.current_char == ']':
-                self.next()
-                token = Token(TokenType.RBRACKET, ']')
-            elif self.current_char == ':':
-                self.next()
-                token = Token(TokenType.COLON, ':')
-            elif self.current_char == ',':
-                self.next()
-                token = Token(TokenType.COMMA, ',')
-            elif self.current_char.isalpha() or self.current_char == '_':
-                token = self.variable()
-            elif self.current_char.isdigit():
-                token = self.number()
-            else:
-                self.error(f'Unexpected character {self.current_char}')
+        if self.pos >= self.length:
+            return None
+        return self._scan()
+
+    def _scan(self) -> Token:
+        # Scan the token at pos, callers make sure the input is not exhausted
+        start = self.pos
+        char = self.text[start]
+        code = ord(char)
+        scanner = DISPATCH[code] if code < 128 else None
+        if scanner is None:
+            scanner = self._fallback_scanner(char)
+        token = scanner(self)
 
         # Record the position of the token
-        if token is not None:
-            self.token_id_position_map[id(token)] = (self.row, self.col)
+        self._token_starts.append(start)
 
         return token
 
-    def get_token_position(self, token: Token) -> Optional[Tuple[int, int]]:
-        return self.token_id_position_map.get(id(token), None)
+    def _fallback_scanner(self, char: str) -> Callable[['Lexer'], Token]:
+        # Scanner for a character that has no entry in DISPATCH
+        if char.isalpha():
+            return Lexer.variable
+        self.error(f'Unexpected character {char}')
+
+    def get_token_position(self, index: int) -> Optional[Tuple[int, int]]:
+        if not 0 <= index < len(self._token_starts):
+            return None
+        return self.get_position(self._token_starts[index])
 
     def whitespaces(self) -> Token:
-        value = ''
-        while self.current_char is not None and self.current_char == ' ':
-            value += self.current_char
-            self.next()
-        return Token(TokenType.SPACES, value)
+        return self._run(TokenType.SPACES, _RE_SPACES)
 
     def tabs(self) -> Token:
-        value = ''
-        while self.current_char is not None and self.current_char == '\t':
-            value += self.current_char
-            self.next()
-        return Token(TokenType.TABS, value)
+        return self._run(TokenType.TABS, _RE_TABS)
 
     def newlines(self) -> Token:
-        value = ''
-        while self.current_char is not None and self.current_char == '\n':
-            value += self.current_char
-            self.next()
-        return Token(TokenType.NEWLINES, value)
+        return self._run(TokenType.NEWLINES, _RE_NEWLINES)
+
+    def _run(self, type: TokenType, pattern: Pattern[str]) -> Token:
+        # A run is fully described by its length, and indentation repeats the same few lengths,
+        # so the value of every run of a given length is one shared string
+        start = self.pos
+        end = self.pos = pattern.match(self.text, start).end()
+        length = end - start
+        if length > _MAX_SHARED_RUN:
+            # Long runs are rare, and caching them would keep their text alive across resets
+            return Token(type, self.text[start:end])
+        runs = self._run_values[type]
+        value = runs.get(length)
+        if value is None:
+            value = runs[length] = self.text[start:end]
+        return Token(type, value)
 
     def comment(self) -> Token:
-        comment = ''
-        while self.current_char is not None and self.current_char != '\n':
-            comment += self.current_char
-            self.next()
-        return Token(TokenType.COMMENT, comment)
+        # A comment runs up to the next newline, which str.find locates without a regex
+        text = self.text
+        start = self.pos
+        end = text.find('\n', start)
+        if end < 0:
+            end = self.length
+        self.pos = end
+        return Token(TokenType.COMMENT, text[start:end])
 
     def string(self) -> Token:
-        string = ''
-        escaped = False
-
-        # skip the initial quote
-        self.next()
-        # read the string
-        while self.current_char is not None and not (self.current_char == '"' and not escaped):
-
-            # check if the current character is escaped
-            if self.current_char == '\\':
-                escaped = True
-            else:
-                escaped = False
-                string += self.current_char
-
-            self.next()
-        # skip the final quote
-        self.next()
-        return Token(TokenType.STRING, string)
+        # Fast path: no backslash before the next quote, so that quote closes the string
+        text = self.text
+        start = self.pos + 1
+        end = text.find('"', start)
+        if end >= 0 and text.find('\\', start, end) < 0:
+            self.pos = end + 1
+            return Token(TokenType.STRING, text[start:end])
+
+        # Otherwise copy the slices between escapes and join them once
+        parts: List[str] = []
+        # pos is where the pending slice starts, scan is where to look for the next quote or backslash
+        pos = scan = start
+        quote = end
+        while True:
+            if quote < scan:
+                quote = text.find('"', scan)
+            if quote < 0:
+                self.pos = self.length
+                self.error('Unterminated string')
+            backslash = text.find('\\', scan, quote)
+            if backslash < 0:
+                parts.append(text[pos:quote])
+                self.pos = quote + 1
+                return Token(TokenType.STRING, ''.join(parts))
+            parts.append(text[pos:backslash])
+            # drop the backslash, the escaped character opens the next slice as is
+            pos = backslash + 1
+            scan = pos + 1
 
     def number(self) -> Token:
-        number = ''
-        while self.current_char is not None and self.current_char.isdigit() or self.current_char == '.':
-            number += self.current_char
-            self.next()
-        return Token(TokenType.NUMBER, number)
+        match = _RE_NUMBER.match(self.text, self.pos)
+        self.pos = match.end()
+        return Token(TokenType.NUMBER, match.group())
 
     def variable(self) -> Token:
-        variable = self.current_char
-        self.next()
+        match = _RE_IDENT.match(self.text, self.pos)
+        self.pos = match.end()
+        return Token(TokenType.VARIABLE, match.group())
+
+
+# Token positions are tracked by index, so tokens with a fixed value are built once and shared
+def _single_char_scanner(type: TokenType, char: str) -> Callable[[Lexer], Token]:
+    token = Token(type, char)
+
+    def scan(lexer: Lexer) -> Token:
+        lexer.pos += 1
+        return token
 
-        while self.current_char is not None and (
-                self.current_char.isalpha() or self.current_char.isdigit() or self.current_char == '_'):
-            variable += self.current_char
-            self.next()
-        return Token(TokenType.VARIABLE, variable)
+    return scan
+
+
+def _keyword_scanner(keyword: str, type: TokenType) -> Callable[[Lexer], Token]:
+    # Keywords share the lexical class of identifiers, so anything that merely starts with one is a variable
+    length = len(keyword)
+    token = Token(type, keyword)
+
+    def scan(lexer: Lexer) -> Token:
+        text = lexer.text
+        end = lexer.pos + length
+        if text.startswith(keyword, lexer.pos) and (
+                end == lexer.length or not (text[end].isalnum() or text[end] == '_')):
+            lexer.pos = end
+            return token
+        return lexer.variable()
+
+    return scan
+
+
+# Scanner to call for a token, indexed by the code of its first (ASCII) character
+DISPATCH: Final[List[Optional[Callable[[Lexer], Token]]]] = [None] * 128
+for _char, _type in (('{', TokenType.LBRACE), ('}', TokenType.RBRACE), ('[', TokenType.LBRACKET),
+                     (']', TokenType.RBRACKET), (':', TokenType.COLON), (',', TokenType.COMMA)):
+    DISPATCH[ord(_char)] = _single_char_scanner(_type, _char)
+DISPATCH[ord('"')] = Lexer.string
+DISPATCH[ord('#')] = Lexer.comment
+DISPATCH[ord('\n')] = Lexer.newlines
+DISPATCH[ord('\t')] = Lexer.tabs
+DISPATCH[ord(' ')] = Lexer.whitespaces
+for _code in [*range(ord('0'), ord('9') + 1), ord('-')]:
+    DISPATCH[_code] = Lexer.number
+for _code in [*range(ord('A'), ord('Z') + 1), *range(ord('a'), ord('z') + 1), ord('_')]:
+    DISPATCH[_code] = Lexer.variable
+DISPATCH[ord('t')] = _keyword_scanner('true', TokenType.BOOLEAN)
+DISPATCH[ord('f')] = _keyword_scanner('false', TokenType.BOOLEAN)
+DISPATCH[ord('n')] = _keyword_scanner('null', TokenType.NULL)
 
 
 if __name__ == '__main__':
@@ -248,4 +320,4 @@ if __name__ == '__main__':
 		}
 	}''')
     print(' '.join([str(token) for token in lexer.tokenize()]))
-    print(lexer.token_id_position_map)
+    print([lexer.get_token_position(i) for i in range(len(lexer._token_starts))])
@@ -1,9 +1,11 @@
-from typing import List, Tuple, Union, Optional
+import threading
+from typing import List, Tuple, Union, Optional, Dict, Callable, Iterator, Final
 
 from config import Config
 from lexer import TokenType, Token, Lexer, EMPTY_SPACE_TYPES, NON_JSON_TYPES
 from syntax_tree import AlexsonNode, Literal, String, Number, Null, Boolean, Variable, Object, Array, \
-    NewLine, WhiteSpace, Tab, BlockNode, LBrace, Colon, Comma, RBrace, NonJson, Comment, LBracket, RBracket, Root
+    NewLine, WhiteSpace, Tab, EmptySpace, BlockNode, LBrace, Colon, Comma, RBrace, NonJson, Comment, LBracket, \
+    RBracket, Root
 
 
 class AlexsonParserException(Exception):
@@ -17,19 +19,45 @@ class AlexsonParserException(Exception):
 
 
 class AlexsonParser:
+    __slots__ = ('text', 'lexer', '_tokens', '_token_index', '_current_token', 'config', '_comments')
+
     def __init__(self, text: str, config: Config = Config()):
+        self.config = config
+        self.lexer = Lexer('')
+        # Comments repeated across the document share a single node
+        self._comments: Dict[str, Comment] = {}
+        self.reset(text)
+
+    def reset(self, text: str) -> None:
+        # Prepare this parser for a new alexson string, so one instance can parse many documents
+        self._comments.clear()
         self.text = text
-        self.lexer = Lexer(text)
-        self.tokens = self.lexer.tokenize()
+        self.lexer.reset(text)
+        # Tokens are pulled from the lexer one at a time as the parser advances
+        self._tokens: Iterator[Token] = self.lexer.iter_tokens()
         self._token_index = 0
-        self._current_token = self.tokens[self._token_index] if len(self.tokens) > 0 else None
-        self.config = config
-
-    def get_token_pos(self, token: Token) -> Tuple[int, int]:
-        if token is None:
+        self._current_token = next(self._tokens, None)
+
+    @classmethod
+    def parse_string(cls, text: str, config: Config = Config()) -> Root:
+        # Parse with an instance reused across calls from the same thread
+        parser = getattr(_reusable, 'parser', None)
+        if type(parser) is not cls:
+            parser = _reusable.parser = cls('', config)
+        parser.config = config
+        try:
+            parser.reset(text)
+            return parser.parse()
+        finally:
+            # Do not keep the last document alive through the reused instance
+            parser.reset('')
+
+    def get_token_pos(self, index: int) -> Tuple[int, int]:
+        position = self.lexer.get_token_position(index)
+        if position is None:
             return -1, -1
 
-        return self.lexer.get_token_position(token)
+        return position
 
     def parse(self) -> Root:
         node = Root()
@@ -39,7 +67,7 @@ class AlexsonParser:
             return node
 
         # Parse empty spaces before the root object/array node
-        node.children.extend(self._parse_non_json())
+        self._parse_non_json(node.children)
         # Return empty block node if the alexson string only contains empty spaces
         if self.current() is None:
             return node
@@ -53,10 +81,10 @@ class AlexsonParser:
             raise AlexsonParserException(
                 f'Unexpected token {self.current()}, expecting Object or Array '
                 f'at the top level of the alexson string',
-                *self.get_token_pos(self.current()))
+                *self.get_token_pos(self._token_index))
 
         # Parse empty spaces after the root object/array node
-        node.children.extend(self._parse_non_json())
+        self._parse_non_json(node.children)
 
         # Check if the alexson string is fully parsed
         assert self.current() is None
@@ -65,166 +93,222 @@ class AlexsonParser:
 
     def _parse_obj(self) -> Object:
         obj = Object()
-
-        if self.current().type != TokenType.LBRACE:
-            raise AlexsonParserException(f'Unexpected token {self.current()}, expecting "{{" here.',
-                                         *self.get_token_pos(self.current()))
+        # Bind everything used per key-value pair to locals once
+        children = obj.children
+        advance = self.advance
+        parse_non_json = self._parse_non_json
+        parse_value = self.parse_value
+        STRING, COLON, COMMA, RBRACE = TokenType.STRING, TokenType.COLON, TokenType.COMMA, TokenType.RBRACE
+        allow_trailing_comma = self.config.allow_trailing_comma
+
+        token = self._current_token
+        if token.type != TokenType.LBRACE:
+            raise AlexsonParserException(f'Unexpected token {token}, expecting "{{" here.',
+                                         *self.get_token_pos(self._token_index))
 
         # Consume '{', add it to the syntax tree
-        obj.children.append(LBrace())
-        self.advance()
+        children.append(LBrace())
+        token = advance()
 
-        while self.current().type != TokenType.RBRACE:
+        while token.type != RBRACE:
             # Parse empty spaces before the key
-            obj.children.extend(self._parse_non_json())
+            parse_non_json(children)
+            token = self._current_token
 
             # Parse key
-            if self.current().type != TokenType.STRING:
-                raise AlexsonParserException(f'Unexpected token {self.current()}', *self.get_token_pos(self.current()))
+            if token.type != STRING:
+                raise AlexsonParserException(f'Unexpected token {token}', *self.get_token_pos(self._token_index))
 
-            key = String(self.current().value)
-            obj.children.append(key)
-            self.advance()
+            key = String(token.value)
+            children.append(key)
+            advance()
 
             # Parse empty spaces after the key
-            obj.children.extend(self._parse_non_json())
+            parse_non_json(children)
+            token = self._current_token
 
             # Consume ':'
-            if self.current().type != TokenType.COLON:
-                raise AlexsonParserException(f'Unexpected token {self.current()}', *self.get_token_pos(self.current()))
-            obj.children.append(Colon())
-            self.advance()
+            if token.type != COLON:
+                raise AlexsonParserException(f'Unexpected token {token}', *self.get_token_pos(self._token_index))
+            children.append(Colon())
+            advance()
 
             # Parse empty spaces before the value
-            obj.children.extend(self._parse_non_json())
+            parse_non_json(children)
 
             # Parse value
-            value = self.parse_value()
-            obj.children.append(value)
+            value = parse_value()
+            index = len(children)
+            children.append(value)
 
             # Check if the key is already in the dictionary
             if key.get_value() in obj.dict:
-                raise AlexsonParserException(f'Duplicate key {key.get_value()}', *self.get_token_pos(self.current()))
+                raise AlexsonParserException(f'Duplicate key {key.get_value()}', *self.get_token_pos(self._token_index))
             # Add the key-value pair to the dictionary
-            obj.dict[key.get_value()] = (key, value)
+            obj.dict[key.get_value()] = (key, value, index)
 
             # Parse empty spaces after the value
-            obj.children.extend(self._parse_non_json())
+            parse_non_json(children)
+            token = self._current_token
 
             # Consume ','
-            if self.current().type == TokenType.COMMA:
-                obj.children.append(Comma())
-                self.advance()
-            elif self.current().type != TokenType.RBRACE:
-                raise AlexsonParserException(f'Unexpected token {self.current()}', *self.get_token_pos(self.current()))
+            if token.type == COMMA:
+                children.append(Comma())
+                advance()
+            elif token.type != RBRACE:
+                raise AlexsonParserException(f'Unexpected token {token}', *self.get_token_pos(self._token_index))
 
             # Parse empty spaces after ','
-            obj.children.extend(self._parse_non_json())
+            parse_non_json(children)
+            token = self._current_token
 
             # If allow_trailing_comma is True, check if the next token is '}' and break the loop
-            if self.config.allow_trailing_comma and self.current().type == TokenType.RBRACE:
+            if allow_trailing_comma and token.type == RBRACE:
                 break
 
         # Consume '}', add it to the syntax tree
-        obj.children.append(RBrace())
-        self.advance()
+        children.append(RBrace())
+        advance()
 
         return obj
 
-    def _parse_non_json(self) -> List[NonJson]:
-        if self.current() is None:
-            return []
-
-        empty_spaces: List[NonJson] = []
-        while self.current().type in NON_JSON_TYPES:
-            if self.current().type == TokenType.NEWLINES:
-                empty_spaces.extend([NewLine()] * len(self.current().value))
-            elif self.current().type == TokenType.SPACES:
-                empty_spaces.extend([WhiteSpace()] * len(self.current().value))
-            elif self.current().type == TokenType.TABS:
-                empty_spaces.extend([Tab()] * len(self.current().value))
-            elif self.current().type == TokenType.COMMENT and self.config.allow_comments:
-                empty_spaces.append(Comment(self.current().value))
-            self.advance()
-        return empty_spaces
+    def _parse_non_json(self, nodes: List[AlexsonNode]) -> None:
+        # Nodes are appended to the children of the enclosing node
+        append = nodes.append
+        advance = self.advance
+        COMMENT = TokenType.COMMENT
+        token = self._current_token
+        while token is not None and token.type in NON_JSON_TYPES:
+            if token.type != COMMENT:
+                append(_EMPTY_SPACE_NODES[token.type](len(token.value)))
+            elif self.config.allow_comments:
+                comment = self._comments.get(token.value)
+                if comment is None:
+                    comment = self._comments[token.value] = Comment(token.value)
+                append(comment)
+            token = advance()
 
     def _parse_array(self) -> Array:
         array = Array()
+        # Bind everything used per item to locals once
+        children = array.children
+        items = array.items
+        advance = self.advance
+        parse_non_json = self._parse_non_json
+        parse_value = self.parse_value
+        COMMA, RBRACKET = TokenType.COMMA, TokenType.RBRACKET
 
         # Consume '[', add it to the syntax tree
-        array.children.append(LBracket())
-        self.advance()
+        children.append(LBracket())
+        token = advance()
 
-        while self.current().type != TokenType.RBRACKET:
+        while token.type != RBRACKET:
             # Parse empty spaces before the value
-            array.children.extend(self._parse_non_json())
+            parse_non_json(children)
 
             # Parse value
-            value = self.parse_value()
-            array.children.append(value)
-            array.items.append(value)
+            value = parse_value()
+            children.append(value)
+            items.append(value)
 
             # Parse empty spaces after the value
-            array.children.extend(self._parse_non_json())
+            parse_non_json(children)
+            token = self._current_token
 
             # Consume ','
-            if self.current().type == TokenType.COMMA:
-                array.children.append(Comma())
-                self.advance()
-            elif self.current().type != TokenType.RBRACKET:
-                raise AlexsonParserException(f'Unexpected token {self.current()}, expecting "," or "]" here.',
-                                             *self.get_token_pos(self.current()))
+            if token.type == COMMA:
+                children.append(Comma())
+                token = advance()
+            elif token.type != RBRACKET:
+                raise AlexsonParserException(f'Unexpected token {token}, expecting "," or "]" here.',
+                                             *self.get_token_pos(self._token_index))
 
         # Consume ']', add it to the syntax tree
-        array.children.append(RBracket())
-        self.advance()
+        children.append(RBracket())
+        advance()
 
         return array
 
     def parse_value(self) -> AlexsonNode:
-        value = None
-        if self.current().type == TokenType.STRING:
-            value = String(self.current().value)
-        elif self.current().type == TokenType.NUMBER:
-            try:
-                # check if the number is a valid float
-                float(self.current().value)
-                value = Number(self.current().value)
-            except ValueError:
-                raise AlexsonParserException(f'Invalid number value {self.current().value}',
-                                             *self.get_token_pos(self.current()))
-        elif self.current().type == TokenType.NULL:
-            value = Null()
-        elif self.current().type == TokenType.BOOLEAN:
-            if self.current().value == 'true':
-                value = Boolean(True)
-            elif self.current().value == 'false':
-                value = Boolean(False)
-            else:
-                raise AlexsonParserException(f'Invalid boolean value {self.current().value}',
-                                             *self.get_token_pos(self.current()))
-        elif self.current().type == TokenType.VARIABLE:
-            value = Variable(self.current().value)
-        # Nested structures
-        elif self.current().type == TokenType.LBRACE:
-            return self._parse_obj()
-        elif self.current().type == TokenType.LBRACKET:
-            return self._parse_array()
+        token = self._current_token
+        if token is None:
+            raise AlexsonParserException('Unexpected end of input, expecting a value here.',
+                                         *self.get_token_pos(self._token_index))
+
+        value_parser = _VALUE_PARSERS[token.type]
+        if value_parser is None:
+            raise AlexsonParserException(f'Unexpected token {token}', *self.get_token_pos(self._token_index))
+        return value_parser(self)
+
+    def _parse_string(self) -> String:
+        value = String(self._current_token.value)
+        self.advance()
+        return value
+
+    def _parse_number(self) -> Number:
+        token = self._current_token
+        try:
+            # Number converts the literal to a float once and keeps the literal for output
+            value = Number(token.value)
+        except ValueError:
+            raise AlexsonParserException(f'Invalid number value {token.value}',
+                                         *self.get_token_pos(self._token_index))
+        self.advance()
+        return value
+
+    def _parse_null(self) -> Null:
+        self.advance()
+        return Null()
+
+    def _parse_boolean(self) -> Boolean:
+        token = self._current_token
+        if token.value == 'true':
+            value = Boolean(True)
+        elif token.value == 'false':
+            value = Boolean(False)
         else:
-            raise AlexsonParserException(f'Unexpected token {self.current()}', *self.get_token_pos(self.current()))
+            raise AlexsonParserException(f'Invalid boolean value {token.value}',
+                                         *self.get_token_pos(self._token_index))
+        self.advance()
+        return value
 
+    def _parse_variable(self) -> Variable:
+        value = Variable(self._current_token.value)
         self.advance()
         return value
 
     def advance(self) -> Token:
         self._token_index += 1
-        self._current_token = self.tokens[self._token_index] if self._token_index < len(self.tokens) else None
+        self._current_token = next(self._tokens, None)
         return self._current_token
 
     def current(self) -> Optional[Token]:
         return self._current_token
 
 
+# Per-thread parser instance used by AlexsonParser.parse_string
+_reusable = threading.local()
+
+# Syntax tree node to emit for each kind of empty space token
+_EMPTY_SPACE_NODES: Final[Dict[TokenType, Callable[[int], EmptySpace]]] = {
+    TokenType.NEWLINES: NewLine,
+    TokenType.SPACES: WhiteSpace,
+    TokenType.TABS: Tab,
+}
+
+
+# Parser to call for a value, indexed by the type of its first token
+_VALUE_PARSERS: Final[List[Optional[Callable[[AlexsonParser], AlexsonNode]]]] = [None] * (max(TokenType) + 1)
+_VALUE_PARSERS[TokenType.STRING] = AlexsonParser._parse_string
+_VALUE_PARSERS[TokenType.NUMBER] = AlexsonParser._parse_number
+_VALUE_PARSERS[TokenType.NULL] = AlexsonParser._parse_null
+_VALUE_PARSERS[TokenType.BOOLEAN] = AlexsonParser._parse_boolean
+_VALUE_PARSERS[TokenType.VARIABLE] = AlexsonParser._parse_variable
+# Nested structures
+_VALUE_PARSERS[TokenType.LBRACE] = AlexsonParser._parse_obj
+_VALUE_PARSERS[TokenType.LBRACKET] = AlexsonParser._parse_array
+
+
 if __name__ == '__main__':
     string = ('{\n'
               '    "nav_buoy": {\n'
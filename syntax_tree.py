@@ -5,6 +5,8 @@ from lexer import Token, TokenType
 
 
 class AlexsonNode(ABC):
+    __slots__ = ()
+
     def __init__(self):
         pass
 
@@ -19,18 +21,22 @@ class AlexsonNode(ABC):
 
 
 class BlockNode(AlexsonNode, ABC):
+    __slots__ = ('children',)
+
     def __init__(self):
         super().__init__()
         self.children: List[AlexsonNode] = []
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return (self.__class__ == other.__class__) and (self.children == other.children)
 
-    def __hash__(self):
-        return hash((tuple(self.children), self.__class__))
+    # Blocks are mutable and hashing one would walk its whole subtree, so they are unhashable
+    __hash__ = None
 
     def to_alexson(self) -> str:
-        return ''.join([child.to_alexson() for child in self.children])
+        return render(self)
 
     def is_array(self) -> bool:
         raise NotImplementedError()
@@ -40,9 +46,11 @@ class BlockNode(AlexsonNode, ABC):
 
 
 class Root(BlockNode):
+    __slots__ = ('primary_obj',)
+
     def __init__(self):
         super().__init__()
-        self.primary_obj: Optional[Object, Array] = None
+        self.primary_obj: Optional[Union[Object, Array]] = None
 
     def get_primary_obj(self) -> Union['Object', 'Array']:
         if self.primary_obj is None:
@@ -61,33 +69,34 @@ class Root(BlockNode):
     def __getitem__(self, item: Union[int, str]) -> AlexsonNode:
         return self.get_primary_obj()[item]
 
-    def __setitem__(self, key: Union[int, str], value: AlexsonNode):
+    def __setitem__(self, key: Union[int, str], value: AlexsonNode) -> None:
         self.get_primary_obj()[key] = value
 
 
 class Object(BlockNode):
+    # dict only indexes the key-value pairs already in children, so BlockNode.__eq__ covers it
+    __slots__ = ('dict',)
+
     def __init__(self, ):
         super().__init__()
-        self.dict: Dict[str, Tuple[String, AlexsonNode]] = {}
-
-    def __eq__(self, other):
-        return super().__eq__(other) and (self.dict == other.dict)
-
-    def __hash__(self):
-        return hash((super().__hash__(), tuple(self.dict.items())))
+        # key -> (key node, value node, index of the value node in children)
+        self.dict: Dict[str, Tuple[String, AlexsonNode, int]] = {}
 
     def __getitem__(self, item: str) -> AlexsonNode:
         return self.dict[item][1]
 
-    def __setitem__(self, key: str, value: AlexsonNode):
+    def __setitem__(self, key: str, value: AlexsonNode) -> None:
         if key in self.dict:
-            self.children[self.children.index(self.dict[key][1])] = value
-            self.dict[key] = (self.dict[key][0], value)
+            key_node, _, index = self.dict[key]
+            self.children[index] = value
+            self.dict[key] = (key_node, value, index)
         else:
             raise NotImplementedError("Cannot add new key to object yet...")
 
 
 class Array(BlockNode):
+    __slots__ = ('items',)
+
     def __init__(self):
         super().__init__()
         self.items: List[AlexsonNode] = []
@@ -95,27 +104,28 @@ class Array(BlockNode):
     def __eq__(self, other):
         return super().__eq__(other) and (self.items == other.items)
 
-    def __hash__(self):
-        return hash((super().__hash__(), tuple(self.items)))
-
     def __getitem__(self, item: int) -> AlexsonNode:
         return self.items[item]
 
-    def __setitem__(self, key: int, value: AlexsonNode):
+    def __setitem__(self, key: int, value: AlexsonNode) -> None:
         self.items[key] = value
 
 
 class Literal(AlexsonNode, ABC):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__()
 
     def get_value(self) -> Union[str, float, bool, None]:
         raise NotImplementedError()
 
-    def set_value(self, value: Union[str, float, bool, None]):
+    def set_value(self, value: Union[str, float, bool, None]) -> None:
         raise NotImplementedError()
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return ((self.__class__ is other.__class__) and
                 (self.get_value() == other.get_value()) and
                 (type(self.get_value()) is type(other.get_value())))
@@ -125,6 +135,8 @@ class Literal(AlexsonNode, ABC):
 
 
 class NonEditable(AlexsonNode, ABC):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__()
 
@@ -136,22 +148,50 @@ class NonEditable(AlexsonNode, ABC):
 
 
 class String(Literal):
+    __slots__ = ('_value', '_rendered')
+
     def __init__(self, value: str):
         super().__init__()
-        self.value: str = value
+        self.value = value
+
+    @property
+    def value(self) -> str:
+        return self._value
+
+    @value.setter
+    def value(self, value: str) -> None:
+        self._value: str = value
+        # Rendered lazily by to_alexson and kept until the value changes
+        self._rendered: Optional[str] = None
 
     def get_value(self) -> str:
         return self.value
 
-    def set_value(self, value: str):
+    def set_value(self, value: str) -> None:
         self.value = value
 
+    def __eq__(self, other):
+        return type(self) is type(other) and self._value == other._value
+
+    def __hash__(self):
+        return hash((type(self), self._value))
+
     def to_alexson(self) -> str:
-        escaped = self.value.replace('"', '\\"')
-        return f'"{escaped}"'
+        rendered = self._rendered
+        if rendered is None:
+            value = self._value
+            # Escape backslashes before quotes so the lexer decodes the output back to the same value
+            if '\\' in value:
+                value = value.replace('\\', '\\\\')
+            if '"' in value:
+                value = value.replace('"', '\\"')
+            rendered = self._rendered = f'"{value}"'
+        return rendered
 
 
 class Number(Literal):
+    __slots__ = ('value', 'original_value')
+
     def __init__(self, value: Union[str, float]):
         super().__init__()
         self.value: float = float(value)
@@ -160,20 +200,20 @@ class Number(Literal):
     def get_value(self) -> float:
         return self.value
 
-    def set_value(self, value: Union[str, float]):
+    def set_value(self, value: Union[str, float]) -> None:
         self.value: float = float(value)
         self.original_value: str = str(value)
 
     def __eq__(self, other):
-        return ((self.__class__ is other.__class__) and
-                (type(self.get_value()) is type(other.get_value()))) and \
-            (abs(self.get_value() - other.get_value()) < 1e-6)
+        return type(self) is type(other) and abs(self.value - other.value) < 1e-6
 
     def to_alexson(self) -> str:
         return self.original_value
 
 
 class Variable(Literal):
+    __slots__ = ('value',)
+
     def __init__(self, name: str):
         super().__init__()
         self.value: str = name
@@ -181,14 +221,22 @@ class Variable(Literal):
     def get_value(self) -> str:
         return self.value
 
-    def set_value(self, value: str):
+    def set_value(self, value: str) -> None:
         self.value = value
 
+    def __eq__(self, other):
+        return type(self) is type(other) and self.value == other.value
+
+    def __hash__(self):
+        return hash((type(self), self.value))
+
     def to_alexson(self) -> str:
         return self.value
 
 
 class Boolean(Literal):
+    __slots__ = ('value',)
+
     def __init__(self, boolean: bool):
         super().__init__()
         self.value: bool = boolean
@@ -196,21 +244,37 @@ class Boolean(Literal):
     def get_value(self) -> bool:
         return self.value
 
-    def set_value(self, value: bool):
+    def set_value(self, value: bool) -> None:
         self.value = value
 
+    def __eq__(self, other):
+        return type(self) is type(other) and self.value == other.value
+
+    def __hash__(self):
+        return hash((type(self), self.value))
+
     def to_alexson(self) -> str:
         return 'true' if self.value else 'false'
 
 
 class Null(Literal):
+    __slots__ = ()
+
+    # Null holds no value and cannot be changed, so every null is the same node
+    _instance: Optional['Null'] = None
+
+    def __new__(cls) -> 'Null':
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
     def __init__(self):
         super().__init__()
 
     def get_value(self) -> None:
         return None
 
-    def set_value(self, value: None):
+    def set_value(self, value: None) -> None:
         pass
 
     def to_alexson(self) -> str:
@@ -218,10 +282,12 @@ class Null(Literal):
 
 
 class NonJson(NonEditable, ABC):
-    pass
+    __slots__ = ()
 
 
 class Comment(NonJson):
+    __slots__ = ('comment',)
+
     def __init__(self, comment: str):
         super().__init__()
         self.comment: str = comment
@@ -236,46 +302,92 @@ class Comment(NonJson):
         return self.comment
 
 
-class WhiteSpace(NonJson):
-    def to_alexson(self) -> str:
-        return ' '
+class EmptySpace(NonJson, ABC):
+    __slots__ = ('count',)
 
+    # A run of one repeated character, kept as a single node
+    char: str = ''
 
-class NewLine(NonJson):
-    def to_alexson(self) -> str:
-        return '\n'
+    def __init__(self, count: int = 1):
+        super().__init__()
+        self.count: int = count
 
+    def __eq__(self, other):
+        return super().__eq__(other) and (self.count == other.count)
+
+    def __hash__(self):
+        return hash((super().__hash__(), self.count))
 
-class Tab(NonJson):
     def to_alexson(self) -> str:
-        return '\t'
+        return self.char * self.count
+
+
+class WhiteSpace(EmptySpace):
+    __slots__ = ()
+    char = ' '
+
+
+class NewLine(EmptySpace):
+    __slots__ = ()
+    char = '\n'
+
+
+class Tab(EmptySpace):
+    __slots__ = ()
+    char = '\t'
 
 
 class Colon(NonEditable):
+    __slots__ = ()
+
     def to_alexson(self) -> str:
         return ':'
 
 
 class Comma(NonEditable):
+    __slots__ = ()
+
     def to_alexson(self) -> str:
         return ','
 
 
 class LBrace(NonEditable):
+    __slots__ = ()
+
     def to_alexson(self) -> str:
         return '{'
 
 
 class RBrace(NonEditable):
+    __slots__ = ()
+
     def to_alexson(self) -> str:
         return '}'
 
 
 class LBracket(NonEditable):
+    __slots__ = ()
+
     def to_alexson(self) -> str:
         return '['
 
 
 class RBracket(NonEditable):
+    __slots__ = ()
+
     def to_alexson(self) -> str:
         return ']'
+
+
+def render(node: AlexsonNode) -> str:
+    # Walk the tree with an explicit stack and join the text of all leaves once
+    stack: List[AlexsonNode] = [node]
+    out: List[str] = []
+    push, pop, write = stack.extend, stack.pop, out.append
+    while stack:
+        node = pop()
+        if isinstance(node, BlockNode):
+            push(reversed(node.children))
+        else:
+            write(node.to_alexson())
+    return ''.join(out)
@@ -1,6 +1,6 @@
 import unittest
 
-from lexer import Lexer, TokenType, Token
+from lexer import Lexer, TokenType, Token, AlexsonLexicalError
 
 
 class TestLexer(unittest.TestCase):
@@ -19,11 +19,30 @@ class TestLexer(unittest.TestCase):
         token = lexer.newlines()
         self.assertEqual(token, Token(TokenType.NEWLINES, '\n\n'))
 
+    def test_mixed_indentation(self):
+        lexer = Lexer('\n\t  \t\n    ')
+        tokens = lexer.tokenize()
+        expected = [
+            Token(TokenType.NEWLINES, '\n'),
+            Token(TokenType.TABS, '\t'),
+            Token(TokenType.SPACES, '  '),
+            Token(TokenType.TABS, '\t'),
+            Token(TokenType.NEWLINES, '\n'),
+            Token(TokenType.SPACES, '    ')
+        ]
+        self.assertEqual(expected, tokens)
+
     def test_comment(self):
         lexer = Lexer('# hello world \n blablabla')
         token = lexer.comment()
         self.assertEqual(token, Token(TokenType.COMMENT, '# hello world '))
 
+    def test_comment_at_end_of_input(self):
+        lexer = Lexer('# hello world')
+        token = lexer.comment()
+        self.assertEqual(token, Token(TokenType.COMMENT, '# hello world'))
+        self.assertEqual(lexer.pos, len('# hello world'))
+
     def test_string(self):
         lexer = Lexer('"I say hello world "blablabla')
         token = lexer.string()
@@ -34,6 +53,11 @@ class TestLexer(unittest.TestCase):
         token = lexer.string()
         self.assertEqual(token, Token(TokenType.STRING, 'I say "hello world"'))
 
+    def test_string_with_escaped_backslash(self):
+        lexer = Lexer('"a\\\\b\\"c"blablabla')
+        token = lexer.string()
+        self.assertEqual(token, Token(TokenType.STRING, 'a\\b"c'))
+
     def test_number(self):
         lexer = Lexer('1234"blabla"')
         token = lexer.number()
@@ -44,11 +68,21 @@ class TestLexer(unittest.TestCase):
         token = lexer.number()
         self.assertEqual(token, Token(TokenType.NUMBER, '1234.5678'))
 
+    def test_number_with_sign_and_exponent(self):
+        lexer = Lexer('-12.5e-3,')
+        tokens = lexer.tokenize()
+        self.assertEqual(tokens, [Token(TokenType.NUMBER, '-12.5e-3'), Token(TokenType.COMMA, ',')])
+
     def test_variable(self):
         lexer = Lexer('STATIONS]123')
         token = lexer.variable()
         self.assertEqual(token, Token(TokenType.VARIABLE, 'STATIONS'))
 
+    def test_peek(self):
+        lexer = Lexer('null')
+        self.assertTrue(lexer.peek('ull'))
+        self.assertFalse(lexer.peek('ulll'))
+
     def test_boolean(self):
         lexer = Lexer('true false')
         tokens = lexer.tokenize()
@@ -59,6 +93,57 @@ class TestLexer(unittest.TestCase):
         ]
         self.assertEqual(expected, tokens)
 
+    def test_fixed_tokens_are_shared(self):
+        lexer = Lexer('[true,true]')
+        tokens = lexer.tokenize()
+        self.assertIs(tokens[1], tokens[3])
+        self.assertEqual(lexer.get_token_position(3), (1, 6))
+
+    def test_reset(self):
+        lexer = Lexer('[1]')
+        lexer.tokenize()
+        lexer.reset('\n  null')
+        self.assertEqual(lexer.tokenize(), [
+            Token(TokenType.NEWLINES, '\n'),
+            Token(TokenType.SPACES, '  '),
+            Token(TokenType.NULL, 'null')
+        ])
+        self.assertEqual(lexer.get_token_position(2), (2, 3))
+
+    def test_token_immutable(self):
+        token = Lexer('{').tokenize()[0]
+        with self.assertRaises(AttributeError):
+            token.value = '}'
+        self.assertEqual(Lexer('{').tokenize(), [Token(TokenType.LBRACE, '{')])
+
+    def test_long_runs_not_shared(self):
+        lexer = Lexer(' ' * 100)
+        self.assertEqual(lexer.tokenize(), [Token(TokenType.SPACES, ' ' * 100)])
+        self.assertNotIn(100, lexer._run_values[TokenType.SPACES])
+
+    def test_keyword_prefixed_variable(self):
+        lexer = Lexer('nullable trueish')
+        tokens = lexer.tokenize()
+        expected = [
+            Token(TokenType.VARIABLE, 'nullable'),
+            Token(TokenType.SPACES, ' '),
+            Token(TokenType.VARIABLE, 'trueish')
+        ]
+        self.assertEqual(expected, tokens)
+
+    def test_token_position(self):
+        lexer = Lexer('{\n  "key": 1}')
+        tokens = lexer.tokenize()
+        self.assertEqual(tokens[3], Token(TokenType.STRING, 'key'))
+        self.assertEqual(lexer.get_token_position(0), (1, 0))
+        self.assertEqual(lexer.get_token_position(3), (2, 3))
+        self.assertIsNone(lexer.get_token_position(len(tokens)))
+
+    def test_unterminated_string(self):
+        lexer = Lexer('"abc')
+        with self.assertRaises(AlexsonLexicalError):
+            lexer.string()
+
     def test_tokenize_1(self):
         lexer = Lexer('{"key": "value"} # comment bla bla \n')
         tokens = lexer.tokenize()
@@ -1,7 +1,8 @@
 import unittest
 
-from parser import AlexsonParser
-from syntax_tree import Boolean, Number, String, Variable, Null, BlockNode, Root
+from lexer import AlexsonLexicalError
+from parser import AlexsonParser, AlexsonParserException, _reusable
+from syntax_tree import Boolean, Number, String, Variable, Null, BlockNode, Root, NewLine, WhiteSpace, Tab
 
 
 class TestParser(unittest.TestCase):
@@ -25,6 +26,17 @@ class TestParser(unittest.TestCase):
         node = parser.parse_value()
         self.assertEqual(node, Number(1234.5678))
 
+    def test_parse_negative_number(self):
+        parser = AlexsonParser('-1.5e3')
+        node = parser.parse_value()
+        self.assertEqual(node, Number(-1500))
+        self.assertEqual(node.to_alexson(), '-1.5e3')
+
+    def test_parse_invalid_number(self):
+        parser = AlexsonParser('1.2.3')
+        with self.assertRaises(AlexsonParserException):
+            parser.parse_value()
+
     def test_parse_string(self):
         parser = AlexsonParser('"I say hello world "')
         node = parser.parse_value()
@@ -35,6 +47,29 @@ class TestParser(unittest.TestCase):
         node = parser.parse_value()
         self.assertEqual(node, String('I say "hello world"'))
 
+    def test_string_with_backslash_round_trip(self):
+        string = '["a\\\\\\"b"]'
+        node = AlexsonParser(string).parse()
+        self.assertEqual(node[0], String('a\\"b'))
+        self.assertEqual(node.to_alexson(), string)
+
+    def test_string_render_after_set_value(self):
+        node = String('say "hi"')
+        self.assertEqual(node.to_alexson(), '"say \\"hi\\""')
+        node.set_value('bye')
+        self.assertEqual(node.to_alexson(), '"bye"')
+
+    def test_equal_literals_hash_equal(self):
+        self.assertEqual(Boolean(1), Boolean(True))
+        self.assertEqual(hash(Boolean(1)), hash(Boolean(True)))
+
+        class Name(str):
+            pass
+
+        self.assertEqual(String(Name('a')), String('a'))
+        self.assertEqual(hash(String(Name('a'))), hash(String('a')))
+        self.assertEqual(hash(Variable(Name('a'))), hash(Variable('a')))
+
     def test_parse_variable(self):
         parser = AlexsonParser('STATIONS')
         node = parser.parse_value()
@@ -44,12 +79,35 @@ class TestParser(unittest.TestCase):
         parser = AlexsonParser('null')
         node = parser.parse_value()
         self.assertEqual(node, Null())
+        self.assertIs(node, Null())
 
     def test_parse_empty(self):
         parser = AlexsonParser('')
         node = parser.parse()
         self.assertEqual(node, Root())
 
+    def test_parse_trailing_non_json(self):
+        parser = AlexsonParser('{} # comment\n')
+        node = parser.parse()
+        self.assertEqual(node.to_alexson(), '{} # comment\n')
+
+    def test_parse_empty_space_runs(self):
+        parser = AlexsonParser('\n\n\t  ')
+        node = parser.parse()
+        self.assertEqual(node.children, [NewLine(2), Tab(1), WhiteSpace(2)])
+        self.assertEqual(node.to_alexson(), '\n\n\t  ')
+
+    def test_parse_error_position(self):
+        parser = AlexsonParser('{\n  "a": 1\n  "b": 2}')
+        with self.assertRaises(AlexsonParserException) as context:
+            parser.parse()
+        self.assertEqual((context.exception.row, context.exception.col), (3, 3))
+
+    def test_parse_truncated(self):
+        parser = AlexsonParser('[1, ')
+        with self.assertRaises(AlexsonParserException):
+            parser.parse()
+
     def test_parse_array(self):
         parser = AlexsonParser('[1, 2.00, 3.1415926, "4", true, false, null]')
         node = parser._parse_array()
@@ -73,6 +131,36 @@ class TestParser(unittest.TestCase):
         self.assertEqual(node.to_alexson(),
                          '{"a": 1, "b": 3.00, "c": 3.1415926, "d": "4", "e": true, "f": false, "g": null}')
 
+    def test_object_equality(self):
+        node = AlexsonParser('{"a": [1, {"b": null}]}')._parse_obj()
+        self.assertEqual(node, node)
+        self.assertEqual(node, AlexsonParser('{"a": [1, {"b": null}]}')._parse_obj())
+        self.assertNotEqual(node, AlexsonParser('{"a": [1, {"b": true}]}')._parse_obj())
+
+    def test_set_equal_values(self):
+        parser = AlexsonParser('{"a": 1, "b": 1}')
+        node = parser._parse_obj()
+
+        node['b'] = Number(2)
+        self.assertEqual(node['a'], Number(1))
+        self.assertEqual(node.to_alexson(), '{"a": 1, "b": 2}')
+
+    def test_reset(self):
+        parser = AlexsonParser('[1]')
+        self.assertEqual(parser.parse().to_alexson(), '[1]')
+        parser.reset('{"a": true}')
+        self.assertEqual(parser.parse()['a'], Boolean(True))
+
+    def test_parse_string_classmethod(self):
+        self.assertEqual(AlexsonParser.parse_string('[1, 2]')[1], Number(2))
+        self.assertEqual(AlexsonParser.parse_string('{"a": null}')['a'], Null())
+
+    def test_parse_string_after_lexical_error(self):
+        with self.assertRaises(AlexsonLexicalError):
+            AlexsonParser.parse_string('"' + 'x' * 50)
+        self.assertEqual(_reusable.parser.text, '')
+        self.assertEqual(AlexsonParser.parse_string('[1]')[0], Number(1))
+
     def test_parser(self):
         string = ('{\n'
                   '    "nav_buoy": {\n'